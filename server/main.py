@@ -22,7 +22,10 @@ import httpx # 导入 httpx 库
 from io import BytesIO # 导入 BytesIO
 import base64 # 导入 base64
 
-from podcast_generator import generate_podcast_audio_api, generate_podcast_with_story_api
+from podcast_generator import generate_podcast_audio_api, generate_podcast_with_story_api, configure_logging
+
+# 生成过程中逐条对白的进度在 DEBUG 级别输出，设置 LOG_LEVEL=DEBUG 可查看；无效的取值回退为 INFO
+configure_logging()
 
 class TaskStatus(str, Enum):
     PENDING = "pending"
@@ -151,19 +154,21 @@ def clean_output_directory():
 
     # 第二阶段：清理 output 目录中可能未被任务关联的孤立文件
     # 或者那些任务还未过期，但文件因为某种原因在内存任务清理阶段没有被删除的文件
-    for filename in os.listdir(output_dir):
-        file_path = os.path.join(output_dir, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                # 获取最后修改时间
-                if now - os.path.getmtime(file_path) > threshold:
-                    os.unlink(file_path)
-                    print(f"Deleted old unassociated file: {file_path}")
-            elif os.path.isdir(file_path):
-                # 可选地，递归删除旧的子目录或其中的文件
-                pass
-        except Exception as e:
-            print(f"Failed to delete {file_path}. Reason: {e}")
+    # os.scandir 的目录项自带文件类型，无需对每个文件再单独 stat 判断类型
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            file_path = entry.path
+            try:
+                if entry.is_file() or entry.is_symlink():
+                    # 获取最后修改时间
+                    if now - entry.stat().st_mtime > threshold:
+                        os.unlink(file_path)
+                        print(f"Deleted old unassociated file: {file_path}")
+                elif entry.is_dir():
+                    # 可选地，递归删除旧的子目录或其中的文件
+                    pass
+            except Exception as e:
+                print(f"Failed to delete {file_path}. Reason: {e}")
 
 async def get_auth_id(x_auth_id: str = Header(..., alias="X-Auth-Id")):
     """
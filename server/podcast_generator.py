@@ -2,28 +2,74 @@
 
 import argparse # Import argparse for command-line arguments
 import os
+import io
 import json
 import time
-import glob
+import random
 import sys
+import shutil
+import threading
 import subprocess # For calling external commands like ffmpeg
 import requests # For making HTTP requests to TTS API
 import uuid # For generating unique filenames for temporary audio files
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from openai_cli import OpenAICli # Moved to top for proper import
 import urllib.parse # For URL encoding
 import re # For regular expression operations
+import logging
 from typing import Optional, Tuple
-from tts_adapters import TTSAdapter, IndexTTSAdapter, EdgeTTSAdapter, FishAudioAdapter, MinimaxAdapter, DoubaoTTSAdapter, GeminiTTSAdapter # Import TTS adapters
+from tts_cache import get_tts_cache, tts_cache_key
+from tts_adapters import _new_pooled_session, TTSAdapter, IndexTTSAdapter, EdgeTTSAdapter, FishAudioAdapter, MinimaxAdapter, DoubaoTTSAdapter, GeminiTTSAdapter # Import TTS adapters
+
+logger = logging.getLogger(__name__)
+
+def configure_logging():
+    """
+    Configures root logging from LOG_LEVEL (default INFO).
+    Per-item progress (dialog text, TTS attempts, trimming) is logged at DEBUG; set LOG_LEVEL=DEBUG to see it.
+    An unrecognized level falls back to INFO instead of failing at startup.
+    """
+    level_name = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+    level = logging.getLevelName(level_name)
+    level_is_valid = isinstance(level, int)
+    logging.basicConfig(level=level if level_is_valid else logging.INFO, format="%(message)s")
+    if not level_is_valid:
+        logger.warning("Unknown LOG_LEVEL '%s'. Falling back to INFO.", level_name)
 
 # Global configuration
 output_dir = "output"
-# file_list_path is now generated uniquely for each merge operation
 tts_providers_config_path = '../config/tts_providers-local.json'
 
 # Global cache for TTS provider configurations
 tts_provider_configs_cache = {}
 
+# ffmpeg/ffprobe availability, checked once at import instead of forking `-version` per call
+_FFMPEG_OK = shutil.which("ffmpeg") is not None
+_FFPROBE_OK = shutil.which("ffprobe") is not None
+
+# Shared HTTP session for all TTS adapters, so connections (and TLS sessions) are reused across utterances.
+# Sized once at import and never re-mounted: the session is shared by concurrent requests, and `threads` comes
+# from API input. Workers beyond this many still get connections, they just aren't kept alive afterwards.
+# Only connection failures are retried at this layer; generate_audio_for_item owns all other retries.
+_HTTP_POOL_MAXSIZE = 64
+_HTTP_SESSION = _new_pooled_session(_HTTP_POOL_MAXSIZE)
+
+# Shared JSON decoder and brace pattern for locating the script object in model responses
+_JSON_DECODER = json.JSONDecoder()
+_RE_JSON_OBJECT_START = re.compile(r'\{')
+
+# Characters kept in dialog text sent to TTS: word characters, whitespace, basic punctuation and CJK
+_DIALOG_SANITIZE_RE = re.compile(r'[^\w\s\-,，.。?？!！\u4e00-\u9fa5]')
+
+# {{name}} placeholders in prompt templates
+_RE_PROMPT_PLACEHOLDER = re.compile(r'\{\{(\w+)\}\}')
+
+# Cache of parsed JSON config files: absolute path -> (st_mtime_ns, parsed data)
+_json_config_cache = {}
+_json_config_cache_lock = threading.Lock()
+
 # Define the TTS provider map
 tts_provider_map = {
     "index-tts": "../config/index-tts.json",
@@ -43,10 +89,25 @@ def read_file_content(filepath):
         raise FileNotFoundError(f"Error: File not found at {filepath}")
 
 def _load_json_config(file_path: str) -> dict:
-    """Loads a JSON configuration file."""
+    """
+    Loads a JSON configuration file.
+    Parsed results are cached per absolute path and re-read only when the file's mtime changes.
+    Callers receive a shallow copy: top-level keys may be set freely, but nested values are shared with the
+    cache and must be treated as read-only (adapters copy the headers and payload templates they modify).
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        cache_key = os.path.abspath(file_path)
+        mtime_ns = os.stat(cache_key).st_mtime_ns
+        with _json_config_cache_lock:
+            cached_entry = _json_config_cache.get(cache_key)
+        if cached_entry is not None and cached_entry[0] == mtime_ns:
+            return dict(cached_entry[1])
+
+        with open(cache_key, 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+        with _json_config_cache_lock:
+            _json_config_cache[cache_key] = (mtime_ns, config_data)
+        return dict(config_data)
     except FileNotFoundError:
         raise FileNotFoundError(f"Error: Configuration file not found at {file_path}")
     except json.JSONDecodeError as e:
@@ -58,17 +119,16 @@ def select_json_config(config_dir='../config', return_file_path=False):
     Returns the content of the selected JSON file.
     If return_file_path is True, returns a tuple of (file_path, content).
     """
-    json_files = glob.glob(os.path.join(config_dir, '*.json'))
-    if not json_files:
+    tts_providers_file_name = os.path.basename(tts_providers_config_path)
+    with os.scandir(config_dir) as entries:
+        json_entries = [entry for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+    if not json_entries:
         raise FileNotFoundError(f"Error: No JSON files found in {config_dir}")
 
-    valid_json_files = []
+    valid_json_files = [entry.path for entry in json_entries if entry.name != tts_providers_file_name]
     print(f"Found JSON configuration files in '{config_dir}':")
-    for i, file_path in enumerate(json_files):
-        file_name = os.path.basename(file_path)
-        if file_name != os.path.basename(tts_providers_config_path):
-            valid_json_files.append(file_path)
-            print(f"{len(valid_json_files)}. {file_name}")
+    for i, file_path in enumerate(valid_json_files, start=1):
+        print(f"{i}. {os.path.basename(file_path)}")
 
     if not valid_json_files:
         raise FileNotFoundError(f"Error: No valid JSON files (excluding tts_providers.json) found in {config_dir}")
@@ -100,135 +160,162 @@ def select_json_config(config_dir='../config', return_file_path=False):
 def generate_speaker_id_text(pod_users, voices_list):
     """
     Generates a text string mapping speaker IDs to their names/aliases based on podUsers and voices.
-    Optimized by converting voices_list to a dictionary for faster lookups.
+    The relevant fields are reduced to tuples so the result can be memoized across script generations.
     """
-    voice_map = {voice.get("code"): voice for voice in voices_list if voice.get("code")}
-    
-    speaker_info = []
-    for speaker_id, pod_user in enumerate(pod_users):
-        pod_user_code = pod_user.get("code")
-        role = pod_user.get("role", "") # Default to "未知角色" if role is not provided
-
-        found_name = None
-        voice = voice_map.get(pod_user_code)
-        if voice:
-            found_name = voice.get("usedname") or voice.get("alias") or voice.get("name")
-        
-        if found_name:
-            if role:
-                speaker_info.append(f"speaker_id={speaker_id}的名叫{found_name}，是一个{role}")
-            else:
-                speaker_info.append(f"speaker_id={speaker_id}的名叫{found_name}")
-        else:
+    pod_user_entries = tuple((pod_user.get("code"), pod_user.get("role", "")) for pod_user in pod_users)
+    voice_entries = tuple(
+        (voice.get("code"), voice.get("usedname"), voice.get("alias"), voice.get("name"))
+        for voice in voices_list if voice.get("code")
+    )
+    return _generate_speaker_id_text_cached(pod_user_entries, voice_entries)
+
+@lru_cache(maxsize=32)
+def _generate_speaker_id_text_cached(pod_user_entries: tuple, voice_entries: tuple) -> str:
+    """Builds the speaker ID text from (code, role) and (code, usedname, alias, name) tuples."""
+    name_map = {code: usedname or alias or name for code, usedname, alias, name in voice_entries}
+
+    resolved = []
+    for speaker_id, (pod_user_code, role) in enumerate(pod_user_entries):
+        found_name = name_map.get(pod_user_code)
+        if not found_name:
             raise ValueError(f"语音code '{pod_user_code}' (speaker_id={speaker_id}) 未找到对应名称或alias。请检查 config/edge-tts.json 中的 voices 配置。")
+        resolved.append((found_name, role))
 
+    speaker_info = [
+        f"speaker_id={speaker_id}的名叫{found_name}，是一个{role}" if role else f"speaker_id={speaker_id}的名叫{found_name}"
+        for speaker_id, (found_name, role) in enumerate(resolved)
+    ]
     return "。".join(speaker_info) + "。"
 
-def merge_audio_files(file_list_path: str):
+def _escape_concat_path(filepath: str) -> str:
+    """Escapes a path for use inside a single-quoted ffmpeg concat list entry."""
+    return filepath.replace("'", "'\\''")
+
+def _probe_audio_stream(filepath: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Uses ffprobe to get (codec_name, sample_rate, channels) of the first audio stream.
+    Returns None if the stream parameters cannot be determined.
+    """
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        filepath
+    ]
+    try:
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        return None
+    values = result.stdout.split()
+    if len(values) != 3:
+        return None
+    return values[0], values[1], values[2]
+
+def _can_stream_copy(audio_filepaths: list) -> bool:
+    """Checks whether all inputs are MP3 with identical stream parameters, so they can be concatenated without re-encoding."""
+    if not audio_filepaths or not all(path.lower().endswith(".mp3") for path in audio_filepaths):
+        return False
+    first_params = _probe_audio_stream(audio_filepaths[0])
+    if first_params is None or first_params[0] != "mp3":
+        return False
+    # Probe the remaining files concurrently; each probe is a separate ffprobe process
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        return all(params == first_params for params in executor.map(_probe_audio_stream, audio_filepaths[1:]))
+
+def _remove_audio_file(filepath: str):
+    """Deletes a temporary audio file if it exists, logging instead of raising on failure."""
+    try:
+        os.remove(filepath)
+        logger.debug("Deleted audio file: %s", filepath)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Error removing audio file %s: %s", filepath, e)
+
+def merge_audio_files(audio_files: list):
     # 生成一个唯一的UUID
     unique_id = str(uuid.uuid4())
     unique_id = unique_id.replace("-", "")
     # 获取当前时间戳
     timestamp = int(time.time())
     # 组合UUID和时间戳作为文件名，去掉 'podcast_' 前缀
-    output_audio_filename_wav = f"{unique_id}{timestamp}.wav"
-    output_audio_filepath_wav = os.path.join(output_dir, output_audio_filename_wav)
     output_audio_filename_mp3 = f"{unique_id}{timestamp}.mp3"
     output_audio_filepath_mp3 = os.path.join(output_dir, output_audio_filename_mp3)
 
     # Use ffmpeg to concatenate audio files
     # Check if ffmpeg is available
-    try:
-        subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True)
-    except FileNotFoundError:
+    if not _FFMPEG_OK:
         raise RuntimeError("FFmpeg is not installed or not in your PATH. Please install FFmpeg to merge audio files. You can download FFmpeg from: https://ffmpeg.org/download.html")
 
-    print(f"\nMerging audio files into {output_audio_filename_wav}...")
+    print(f"\nMerging audio files into {output_audio_filename_mp3}...")
+    audio_filepaths = [os.path.abspath(audio_file) for audio_file in audio_files]
+    # Repeated dialog lines reference the same file; probe and delete each file only once
+    unique_audio_filepaths = list(dict.fromkeys(audio_filepaths))
     try:
+        # The concat list is fed to ffmpeg on stdin instead of being written to a temporary file.
+        # Entries need an explicit file: protocol, otherwise ffmpeg resolves them against the pipe: URL.
+        file_list_content = "".join(f"file 'file:{_escape_concat_path(audio_filepath)}'\n" for audio_filepath in audio_filepaths)
+        logger.debug("Content of ffmpeg concat list:\n%s", file_list_content)
+        if _can_stream_copy(unique_audio_filepaths):
+            # 所有输入均为参数一致的 MP3，直接拼接，无需重新编码
+            print("All inputs are MP3 with matching parameters. Concatenating without re-encoding...")
+            codec_args = ["-c", "copy"]
+        else:
+            codec_args = [
+                "-c:a", "libmp3lame", # Use libmp3lame for MP3 encoding
+                "-b:a", "192k", # Audio bitrate to 192kbps for high quality
+            ]
         command = [
             "ffmpeg",
+            "-protocol_whitelist", "file,pipe", # Entries read from the pipe still need to open local files
             "-f", "concat",
             "-safe", "0",
-            "-i", os.path.basename(file_list_path),  # Use the passed file_list_path
-            "-acodec", "pcm_s16le",
-            "-ar", "44100",
-            "-ac", "2",
-            output_audio_filename_wav # Output to WAV first
+            "-i", "pipe:0",  # Entries are absolute paths, so no cwd change is needed
+            "-vn", # No video
+            *codec_args,
+            output_audio_filepath_mp3 # Output MP3 directly, no intermediate WAV
         ]
-        # Execute ffmpeg from the output_dir to correctly resolve file paths in file_list.txt
-        process = subprocess.run(command, check=True, cwd=output_dir, capture_output=True, text=True)
-        print(f"Audio files merged successfully into {output_audio_filepath_wav}!")
+        process = subprocess.run(command, input=file_list_content, check=True, capture_output=True, encoding='utf-8', errors='replace')
+        print(f"Audio files merged successfully into {output_audio_filepath_mp3}!")
         print("FFmpeg stdout:\n", process.stdout)
         print("FFmpeg stderr:\n", process.stderr)
 
-        # Convert WAV to MP3
-        print(f"Converting {output_audio_filename_wav} to {output_audio_filename_mp3} (high quality)...")
-        mp3_command = [
-            "ffmpeg",
-            "-i", output_audio_filename_wav,
-            "-vn", # No video
-            "-b:a", "192k", # Audio bitrate to 192kbps for high quality
-            "-acodec", "libmp3lame", # Use libmp3lame for MP3 encoding
-            output_audio_filename_mp3
-        ]
-        mp3_process = subprocess.run(mp3_command, check=True, cwd=output_dir, capture_output=True, text=True)
-        print(f"Conversion to MP3 successful! Output: {output_audio_filepath_mp3}")
-        print("FFmpeg MP3 stdout:\n", mp3_process.stdout)
-        print("FFmpeg MP3 stderr:\n", mp3_process.stderr)
-        
         return output_audio_filename_mp3 # Return the MP3 filename
     except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Error merging or converting audio files with FFmpeg: {e.stderr}")
+        raise RuntimeError(f"Error merging audio files with FFmpeg: {e.stderr}")
     finally:
-        # Clean up audio files listed in the file list, the file list itself, and the intermediate WAV file
-        try:
-            # Read the file list and delete the audio files listed
-            if os.path.exists(file_list_path):
-                with open(file_list_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        # Parse lines like: file 'temp_audio_12345.mp3'
-                        if line.startswith("file "):
-                            # Extract the filename, removing quotes
-                            filename = line[5:].strip().strip("'\"")
-                            filepath = os.path.join(output_dir, filename)
-                            try:
-                                if os.path.exists(filepath):
-                                    os.remove(filepath)
-                                    print(f"Deleted audio file: {filename}")
-                            except OSError as e:
-                                print(f"Error removing audio file {filename}: {e}")
-                
-                # Delete the file list itself
-                try:
-                    os.remove(file_list_path)
-                    print(f"Deleted file list: {os.path.basename(file_list_path)}")
-                except OSError as e:
-                    print(f"Error removing file list {file_list_path}: {e}")
-        except Exception as e:
-            print(f"Error reading file list for cleanup: {e}")
-        
-        # Clean up the intermediate WAV file
-        try:
-            if os.path.exists(output_audio_filepath_wav):
-                os.remove(output_audio_filepath_wav)
-                print(f"Cleaned up intermediate WAV file: {output_audio_filename_wav}")
-        except OSError as e:
-            print(f"Error removing intermediate WAV file {output_audio_filepath_wav}: {e}")
-        
+        # Clean up the merged input files; unlink in parallel, which helps most when output_dir is on a network filesystem
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(_remove_audio_file, unique_audio_filepaths))
         print("Cleaned up temporary files.")
 
 def get_audio_duration(filepath: str) -> Optional[float]:
     """
     Uses ffprobe to get the duration of an audio file in seconds.
+    Results are cached by (path, mtime, size), so repeated calls on an unchanged file skip ffprobe.
     Returns None if duration cannot be determined.
     """
-    try:
-        # Check if ffprobe is available
-        subprocess.run(["ffprobe", "-version"], check=True, capture_output=True, text=True)
-    except FileNotFoundError:
+    # Check if ffprobe is available
+    if not _FFPROBE_OK:
         print("Error: ffprobe is not installed or not in your PATH. Please install FFmpeg (which includes ffprobe) to get audio duration.")
         return None
 
+    try:
+        stat_result = os.stat(filepath)
+    except OSError:
+        # Let ffprobe report the missing or unreadable file
+        return _probe_audio_duration(filepath)
+    return _probe_audio_duration_cached(os.path.abspath(filepath), stat_result.st_mtime_ns, stat_result.st_size)
+
+@lru_cache(maxsize=2048)
+def _probe_audio_duration_cached(filepath: str, mtime_ns: int, size: int) -> Optional[float]:
+    """Memoized _probe_audio_duration; mtime_ns and size are part of the key so a rewritten file is probed again."""
+    return _probe_audio_duration(filepath)
+
+def _probe_audio_duration(filepath: str) -> Optional[float]:
+    """Runs ffprobe to read the duration of an audio file in seconds, or None on failure."""
     try:
         command = [
             "ffprobe",
@@ -253,114 +340,62 @@ def get_audio_duration(filepath: str) -> Optional[float]:
 def trim_audio_silence(input_filepath: str, output_filepath: str, silence_threshold_db: float = -60, min_silence_duration: float = 0.5, enable_trim: bool = True):
     """
     Removes leading and trailing silence from an audio file using ffmpeg.
+    Detection and trimming happen in a single ffmpeg pass with the silenceremove filter.
     
     Args:
         input_filepath (str): Path to the input audio file.
         output_filepath (str): Path where the trimmed audio file will be saved.
         silence_threshold_db (float): Silence threshold in dB. Audio below this level is considered silence.
-        min_silence_duration (float): Minimum duration of silence to detect, in seconds.
+        min_silence_duration (float): Unused since trimming moved to silenceremove; kept for backwards compatibility.
         enable_trim (bool): Whether to enable silence trimming. If False, just copy the file.
     """
     # 如果不启用去除空白，直接复制文件
     if not enable_trim:
         try:
             subprocess.run(["ffmpeg", "-i", input_filepath, "-c", "copy", output_filepath], check=True, capture_output=True)
-            print(f"Silence trimming disabled. Copied {input_filepath} to {output_filepath}")
+            logger.debug("Silence trimming disabled. Copied %s to %s", input_filepath, output_filepath)
             return
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Error copying audio file: {e}")
     
-    try:
-        # Check if ffmpeg is available
-        subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True)
-    except FileNotFoundError:
+    # Check if ffmpeg is available
+    if not _FFMPEG_OK:
         raise RuntimeError("FFmpeg is not installed or not in your PATH. Please install FFmpeg to trim audio silence. You can download FFmpeg from: https://ffmpeg.org/download.html")
 
-    print(f"Trimming silence from {input_filepath}...")
+    logger.debug("Trimming silence from %s...", input_filepath)
     try:
-        command = [
+        # 保留首尾各200ms的空白
+        padding_s = 0.2
+
+        # silenceremove 只裁剪开头的静音；通过 areverse 反转后再裁剪一次来处理结尾静音，
+        # 避免 stop_periods 在句中停顿处截断音频
+        leading_silence_filter = f"silenceremove=start_periods=1:start_duration=0:start_threshold={silence_threshold_db}dB:start_silence={padding_s}"
+        trim_command = [
             "ffmpeg",
+            "-y",
             "-i", input_filepath,
-            "-af",
-            f"silencedetect=n={silence_threshold_db}dB:d={min_silence_duration}",
-            "-f", "null",
-            "-"
+            "-af", f"{leading_silence_filter},areverse,{leading_silence_filter},areverse",
+            "-c:a", "libmp3lame",  # Re-encode to MP3 for consistency and smaller size
+            "-q:a", "2",           # High quality
+            output_filepath
         ]
-        process = subprocess.run(command, check=False, capture_output=True, text=True)
-        
-        # Parse output for silence points
-        lines = process.stderr.splitlines()
-        start_trim = 0.0
-        end_trim = get_audio_duration(input_filepath) # Default to full duration
-
-        silence_starts = []
-        silence_ends = []
-
-        for line in lines:
-            if "silencedetect" in line:
-                if "silence_start" in line:
-                    match = re.search(r"silence_start: (\d+\.\d+)", line)
-                    if match:
-                        start = float(match.group(1))
-                        silence_starts.append(start)
-                elif "silence_end" in line:
-                    match = re.search(r"silence_end: (\d+\.\d+)", line)
-                    if match:
-                        end = float(match.group(1))
-                        silence_ends.append(end)
-
-        current_audio_duration = get_audio_duration(input_filepath)
-        if current_audio_duration is None:
-            print(f"Warning: Could not get duration for {input_filepath}. Skipping silence trim.")
-            subprocess.run(["ffmpeg", "-i", input_filepath, "-c", "copy", output_filepath], check=True)
-            return
-
-        start_trim_val = 0.0 # Initialize start_trim_val
-        end_trim_val = current_audio_duration # Initialize end_trim_val with the full duration
-        
-        # 保留首尾各30ms的空白
-        padding_ms = 0.2  # 30ms = 0.03秒
-
-        if silence_starts and silence_ends:
-            # Determine leading silence
-            if silence_starts[0] == 0.0: # Silence at the very beginning
-                # 从静音结束处往前保留30ms
-                start_trim_val = max(0.0, silence_ends[0] - padding_ms)
-            
-            # Determine trailing silence
-            # Only consider trimming from the end if there's silence close to the end
-            if silence_ends[-1] >= (end_trim_val - min_silence_duration):
-                # 从静音开始处往后保留30ms
-                end_trim_val = min(current_audio_duration, silence_starts[-1] + padding_ms)
-
-        # If after trimming, the duration becomes too short or negative, skip trimming
-        if (end_trim_val - start_trim_val) <= 0.01: # Add a small epsilon to avoid issues with very short audios
-            print(f"Skipping trim for {input_filepath}: trimmed duration too short or negative. Copying original.")
-            # If trimming would result in empty or near-empty file, just copy the original
-            subprocess.run(["ffmpeg", "-i", input_filepath, "-c", "copy", output_filepath], check=True)
+        # stderr is kept as raw bytes and only decoded if ffmpeg fails
+        subprocess.run(trim_command, check=True, capture_output=True)
+
+        # If after trimming, the duration becomes too short or undeterminable, keep the original audio
+        trimmed_duration = get_audio_duration(output_filepath)
+        if trimmed_duration is None or trimmed_duration <= 0.01: # Add a small epsilon to avoid issues with very short audios
+            logger.info("Skipping trim for %s: trimmed duration too short or unknown. Copying original.", input_filepath)
+            subprocess.run(["ffmpeg", "-y", "-i", input_filepath, "-c", "copy", output_filepath], check=True, capture_output=True)
         else:
-            # Perform the actual trim using detected silence points
-            trim_command = [
-                "ffmpeg",
-                "-ss", str(start_trim_val), # Move -ss before -i for accurate seeking
-                "-i", input_filepath,
-                "-to", str(end_trim_val),
-                "-avoid_negative_ts", "auto", # Add to handle potential time stamp issues
-                "-c:a", "libmp3lame",  # Re-encode to MP3 for consistency and smaller size
-                "-q:a", "2",           # High quality
-                output_filepath
-            ]
-            subprocess.run(trim_command, check=True, capture_output=True, text=True)
-            trimmed_duration = get_audio_duration(output_filepath)
-            print(f"Trimmed audio saved to {output_filepath}. Original duration: {current_audio_duration:.2f}s, Trimmed duration: {trimmed_duration:.2f}s")
+            logger.debug("Trimmed audio saved to %s. Trimmed duration: %.2fs", output_filepath, trimmed_duration)
 
     except subprocess.CalledProcessError as e:
-        print(f"FFmpeg stderr during silence detection or trimming:\n{e.stderr}")
+        print(f"FFmpeg stderr during silence trimming:\n{e.stderr.decode('utf-8', errors='replace') if e.stderr else ''}")
         raise RuntimeError(f"Error trimming audio silence with FFmpeg for {input_filepath}: {e}")
     except Exception as e:
         raise RuntimeError(f"An unexpected error occurred during audio trimming for {input_filepath}: {e}")
 
-
 def _parse_arguments():
     """Parses command-line arguments."""
     parser = argparse.ArgumentParser(description="Generate podcast script and audio using OpenAI and local TTS.")
@@ -457,22 +492,31 @@ def _extract_custom_content(input_prompt_content):
             input_prompt_content = input_prompt_content[end_index + len(custom_end_tag):].strip()
     return custom_content, input_prompt_content
 
+def _fill_prompt_placeholders(prompt: str, values: dict) -> str:
+    """
+    Replaces {{name}} placeholders in a prompt template in a single pass.
+    Placeholders without a value in `values` are left untouched.
+    """
+    return _RE_PROMPT_PLACEHOLDER.sub(lambda match: values.get(match.group(1), match.group(0)), prompt)
+
 def _prepare_podcast_prompts(config_data, original_podscript_prompt, custom_content, usetime: Optional[str] = None, output_language: Optional[str] = None):
     """Prepares the podcast script prompts with speaker info and placeholders."""
     pod_users = config_data.get("podUsers", [])
     voices = config_data.get("voices", [])
     turn_pattern = config_data.get("turnPattern", "random")
 
-    original_podscript_prompt = original_podscript_prompt.replace("{{numSpeakers}}", str(len(pod_users)))
-    original_podscript_prompt = original_podscript_prompt.replace("{{turnPattern}}", turn_pattern)
-
     usetime = usetime if usetime is not None else "5-6 minutes"
     print(f"\nGenerating Script Replace Usetime: {usetime}")
-    original_podscript_prompt = original_podscript_prompt.replace("{{usetime}}", usetime)
 
     output_language = output_language if output_language is not None else "Make sure the input language is set as the output language"
     print(f"\nGenerating Script Replace Output Language: {output_language}")
-    original_podscript_prompt = original_podscript_prompt.replace("{{outlang}}", output_language)
+
+    original_podscript_prompt = _fill_prompt_placeholders(original_podscript_prompt, {
+        "numSpeakers": str(len(pod_users)),
+        "turnPattern": turn_pattern,
+        "usetime": usetime,
+        "outlang": output_language,
+    })
 
     speaker_id_info = generate_speaker_id_text(pod_users, voices)
     podscript_prompt = speaker_id_info  + "\n\n" + custom_content + "\n\n" + original_podscript_prompt
@@ -493,23 +537,27 @@ def _is_content_quality_acceptable(content: str, title: str, tags: str, content_
         try:
             # Check if the content contains valid podcast script JSON with transcripts
             podcast_script = json.loads(content)
-            if "podcast_transcripts" not in podcast_script:
-                return False
-            transcripts = podcast_script.get("podcast_transcripts", [])
-            if not transcripts or len(transcripts) == 0:
-                return False
-            # Check if transcripts have required fields (speaker_id and dialog)
-            for transcript in transcripts:
-                if "speaker_id" not in transcript or "dialog" not in transcript:
-                    return False
-                dialog = transcript.get("dialog", "").strip()
-                if not dialog or len(dialog) < 1:
-                    return False
-            return True
         except json.JSONDecodeError:
             return False
+        return _is_podcast_script_acceptable(podcast_script)
     return False
 
+def _is_podcast_script_acceptable(podcast_script: dict) -> bool:
+    """Checks an already decoded podcast script for non-empty transcripts with speaker_id and dialog."""
+    if "podcast_transcripts" not in podcast_script:
+        return False
+    transcripts = podcast_script.get("podcast_transcripts", [])
+    if not transcripts or len(transcripts) == 0:
+        return False
+    # Check if transcripts have required fields (speaker_id and dialog)
+    for transcript in transcripts:
+        if "speaker_id" not in transcript or "dialog" not in transcript:
+            return False
+        dialog = transcript.get("dialog", "").strip()
+        if not dialog or len(dialog) < 1:
+            return False
+    return True
+
 
 def _generate_overview_content(api_key, base_url, model, overview_prompt, input_prompt, output_language: Optional[str] = None) -> Tuple[str, str, str]:
     """Generates overview content using OpenAI CLI, and extracts title and tags."""
@@ -521,11 +569,15 @@ def _generate_overview_content(api_key, base_url, model, overview_prompt, input_
     while attempt < max_retries:
         try:
             # Replace the placeholder with the actual output language
-            formatted_overview_prompt = overview_prompt.replace("{{outlang}}", output_language if output_language is not None else "Make sure the input language is set as the output language")
+            formatted_overview_prompt = _fill_prompt_placeholders(overview_prompt, {"outlang": output_language if output_language is not None else "Make sure the input language is set as the output language"})
 
             openai_client_overview = OpenAICli(api_key=api_key, base_url=base_url, model=model, system_message=formatted_overview_prompt)
             overview_response_generator = openai_client_overview.chat_completion(messages=[{"role": "user", "content": input_prompt}])
-            overview_content = "".join([chunk.choices[0].delta.content for chunk in overview_response_generator if chunk.choices and chunk.choices[0].delta.content])
+            overview_buffer = io.StringIO()
+            for chunk in overview_response_generator:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    overview_buffer.write(chunk.choices[0].delta.content)
+            overview_content = overview_buffer.getvalue()
 
             # Extract title (first line) and tags (second line)
             lines = overview_content.strip().split('\n')
@@ -565,7 +617,28 @@ def _generate_overview_content(api_key, base_url, model, overview_prompt, input_
                 raise RuntimeError(f"Error generating overview after {max_retries} attempts: {e}")
             else:
                 print(f"Attempt {attempt}/{max_retries} failed: {e}. Retrying...")
-                time.sleep(1 * attempt)  # Exponential backoff
+                time.sleep(min(4.0, 0.25 * (2 ** (attempt - 1))) * random.uniform(0.5, 1.5))  # Exponential backoff with jitter
+
+def _find_podcast_script_json(podscript_json_str: str) -> Tuple[Optional[dict], str]:
+    """
+    Scans the model response for the first JSON object that contains 'podcast_transcripts'.
+    Returns (podcast_script, valid_json_str), or (None, "") if no such object is found.
+    """
+    decoded_until = 0
+
+    # 只在 '{' 位置尝试解码，并直接传入起始偏移，避免每次切片复制剩余字符串
+    for brace_match in _RE_JSON_OBJECT_START.finditer(podscript_json_str):
+        idx = brace_match.start()
+        if idx < decoded_until: # Skip braces nested inside an already decoded object
+            continue
+        try:
+            obj, end = _JSON_DECODER.raw_decode(podscript_json_str, idx)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(obj, dict) and "podcast_transcripts" in obj:
+            return obj, podscript_json_str[idx:end]
+        decoded_until = end
+    return None, ""
 
 def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overview_content):
     """Generates and parses podcast script JSON using OpenAI CLI."""
@@ -579,29 +652,32 @@ def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overvie
         podscript_json_str = ""
         try:
             openai_client_podscript = OpenAICli(api_key=api_key, base_url=base_url, model=model, system_message=podscript_prompt)
-            # Generate the response string first
-            podscript_json_str = "".join([chunk.choices[0].delta.content for chunk in openai_client_podscript.chat_completion(messages=[{"role": "user", "content": overview_content}]) if chunk.choices and chunk.choices[0].delta.content])
+            response_stream = openai_client_podscript.chat_completion(messages=[{"role": "user", "content": overview_content}])
 
             podcast_script = None
-            decoder = json.JSONDecoder()
-            idx = 0
             valid_json_str = ""
-
-            while idx < len(podscript_json_str):
-                try:
-                    obj, end = decoder.raw_decode(podscript_json_str[idx:])
-                    if isinstance(obj, dict) and "podcast_transcripts" in obj:
-                        podcast_script = obj
-                        valid_json_str = podscript_json_str[idx : idx + end]
-                        break
-                    idx += end
-                except json.JSONDecodeError:
-                    idx += 1
-                    next_brace = podscript_json_str.find('{', idx)
-                    if next_brace != -1:
-                        idx = next_brace
-                    else:
+            podscript_buffer = io.StringIO()
+            # 脚本对象以 "]}" 结尾，只有在看到 "]" 之后出现 "}" 时才尝试解析，避免每个分块都重新扫描
+            closing_bracket_pending = False
+            for chunk in response_stream:
+                if not (chunk.choices and chunk.choices[0].delta.content):
+                    continue
+                content = chunk.choices[0].delta.content
+                podscript_buffer.write(content)
+                closing_bracket_pending = closing_bracket_pending or "]" in content
+                if closing_bracket_pending and "}" in content:
+                    podcast_script, valid_json_str = _find_podcast_script_json(podscript_buffer.getvalue())
+                    if podcast_script is not None:
+                        # 脚本对象已完整，提前结束流式接收
+                        close_stream = getattr(response_stream, "close", None)
+                        if close_stream:
+                            close_stream()
                         break
+                    closing_bracket_pending = "]" in content[content.rfind("}") + 1:]
+            podscript_json_str = podscript_buffer.getvalue()
+
+            if podcast_script is None:
+                podcast_script, valid_json_str = _find_podcast_script_json(podscript_json_str)
 
             if podcast_script is None:
                 print(f"Could not find a valid podcast script JSON object with 'podcast_transcripts' key in response, attempt {attempt + 1}/{max_retries}")
@@ -625,7 +701,8 @@ def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overvie
                     continue
 
             # Check if the generated script meets quality standards
-            if _is_content_quality_acceptable(valid_json_str, "", "", "script"):
+            # The script object is already decoded; validate it directly instead of parsing valid_json_str again
+            if _is_podcast_script_acceptable(podcast_script):
                 print(f"Generated podcast script meets quality standards on attempt {attempt + 1}")
                 return podcast_script
             else:
@@ -642,67 +719,143 @@ def _generate_podcast_script(api_key, base_url, model, podscript_prompt, overvie
                 raise ValueError(f"Error decoding JSON from podcast script response: {e}. Raw response: {podscript_json_str}")
             else:
                 print(f"JSON decode error on attempt {attempt}: {e}. Retrying...")
-                time.sleep(1 * attempt)  # Exponential backoff
+                time.sleep(random.uniform(0, min(30.0, 1.0 * (2 ** attempt))))  # Exponential backoff with full jitter
         except Exception as e:
             attempt += 1
             if attempt >= max_retries:
                 raise RuntimeError(f"Error generating podcast script after {max_retries} attempts: {e}")
             else:
                 print(f"Attempt {attempt}/{max_retries} failed: {e}. Retrying...")
-                time.sleep(1 * attempt)  # Exponential backoff
+                time.sleep(random.uniform(0, min(30.0, 1.0 * (2 ** attempt))))  # Exponential backoff with full jitter
 
-def generate_audio_for_item(item, config_data, tts_adapter, max_retries: int = 3):
-    """Generate audio for a single podcast transcript item using the provided TTS adapter."""
+class _AudioGenerationCancelled(RuntimeError):
+    """Raised by generate_audio_for_item when stop_event is set; never retried."""
+
+def _resolve_item_voice(item, voice_map, pod_users, tts_adapter) -> Tuple[str, Optional[str], float, float]:
+    """
+    Resolves (voice_code, tts_provider, volume_adjustment, speed_adjustment) for a transcript item.
+    Raises ValueError if the speaker has no voice code or no initialized adapter.
+    """
     speaker_id = item.get("speaker_id")
-    dialog = item.get("dialog")
 
     voice_code = None
     volume_adjustment = 0.0 # 默认值为 0.0
     speed_adjustment = 0.0 # 默认值为 0.0
     voice_tts_provider = None # 默认使用主要的 TTS 提供商
 
-
-    if config_data and "podUsers" in config_data and 0 <= speaker_id < len(config_data["podUsers"]):
-        pod_user_entry = config_data["podUsers"][speaker_id]
+    if pod_users and isinstance(speaker_id, int) and 0 <= speaker_id < len(pod_users):
+        pod_user_entry = pod_users[speaker_id]
         voice_code = pod_user_entry.get("code")
         voice_tts_provider = pod_user_entry.get("owner") # 获取特定于该说话者的 TTS 提供商
         
-        # 从 voices 列表中获取对应的 volume_adjustment
-        voice_map = {voice.get("code"): voice for voice in config_data.get("voices", []) if voice.get("code")}
-        volume_adjustment = voice_map.get(voice_code, {}).get("volume_adjustment", 0.0)
-        speed_adjustment = voice_map.get(voice_code, {}).get("speed_adjustment", 0.0)
+        # 从 voices 映射中获取对应的 volume_adjustment
+        voice_entry = voice_map.get(voice_code, {})
+        volume_adjustment = voice_entry.get("volume_adjustment", 0.0)
+        speed_adjustment = voice_entry.get("speed_adjustment", 0.0)
 
     if not voice_code:
         raise ValueError(f"No voice code found for speaker_id {speaker_id}. Cannot generate audio for this dialog.")
+    if voice_tts_provider not in tts_adapter:
+        raise ValueError(f"No TTS adapter initialized for provider {voice_tts_provider} (speaker_id {speaker_id}, voice {voice_code}).")
+    return voice_code, voice_tts_provider, volume_adjustment, speed_adjustment
+
+def generate_audio_for_item(item, voice_settings, tts_adapter, max_retries: int = 3, stop_event: Optional[threading.Event] = None):
+    """
+    Generate audio for a single podcast transcript item using the provided TTS adapter.
+    The caller sanitizes the dialog and resolves voice_settings (see _resolve_item_voice) for the
+    whole script before any item is submitted.
+    If stop_event is set (another item failed), no further attempts are made.
+    """
+    speaker_id = item.get("speaker_id")
+    dialog = item.get("dialog")
+    voice_code, voice_tts_provider, volume_adjustment, speed_adjustment = voice_settings
     
     # 如果 tts_adapter 是映射对象，则根据 voice_tts_provider 选择对应的适配器
     selected_adapter = tts_adapter[voice_tts_provider]
-    # print(f"dialog-before: {dialog}")
-    dialog = re.sub(r'[^\w\s\-,，.。?？!！\u4e00-\u9fa5]', '', dialog)
-    print(f"dialog: {dialog}")
+    logger.debug("dialog: %s", dialog)
+
+    # 相同的对白、语音和音效参数直接复用缓存的音频，无需再次调用 TTS 接口
+    tts_cache = get_tts_cache()
+    cache_key = None
+    if tts_cache is not None:
+        cache_key = tts_cache_key(dialog, voice_code, voice_tts_provider, volume_adjustment, speed_adjustment, selected_adapter.cache_fingerprint())
+        cached_audio_file = tts_cache.get(cache_key, output_dir)
+        if cached_audio_file:
+            logger.debug("TTS cache hit for speaker %s (%s): %s", speaker_id, voice_code, cached_audio_file)
+            return cached_audio_file
     
+    cancelled_message = f"Audio generation for speaker {speaker_id} ({voice_code}) was cancelled because another item failed."
     for attempt in range(max_retries):
+        if stop_event is not None and stop_event.is_set():
+            raise _AudioGenerationCancelled(cancelled_message)
         try:
-            print(f"Calling TTS API for speaker {speaker_id} ({voice_code}) with adapter (Attempt {attempt + 1}/{max_retries})...")
-            temp_audio_file = selected_adapter.generate_audio(
-                text=dialog,
-                voice_code=voice_code,
-                output_dir=output_dir,
-                volume_adjustment=volume_adjustment, # 传递音量调整参数
-                speed_adjustment=speed_adjustment # 传递速度调整参数
-            )
+            logger.debug("Calling TTS API for speaker %s (%s) with adapter (Attempt %d/%d)...", speaker_id, voice_code, attempt + 1, max_retries)
+            # 按提供商的并发上限排队，线程数可以放大而不会超出提供商的 QPS
+            with selected_adapter.concurrency_slot():
+                # The batch may have failed while this worker was queued for the slot
+                if stop_event is not None and stop_event.is_set():
+                    raise _AudioGenerationCancelled(cancelled_message)
+                temp_audio_file = selected_adapter.generate_audio(
+                    text=dialog,
+                    voice_code=voice_code,
+                    output_dir=output_dir,
+                    volume_adjustment=volume_adjustment, # 传递音量调整参数
+                    speed_adjustment=speed_adjustment # 传递速度调整参数
+                )
+            if cache_key is not None:
+                tts_cache.put(cache_key, temp_audio_file)
             return temp_audio_file
+        except _AudioGenerationCancelled:
+            raise
         except RuntimeError as e: # Catch specific RuntimeError from TTS adapters
-            print(f"Error generating audio for speaker {speaker_id} ({voice_code}) on attempt {attempt + 1}: {e}")
+            logger.warning("Error generating audio for speaker %s (%s) on attempt %d: %s", speaker_id, voice_code, attempt + 1, e)
             if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+                # Full jitter keeps concurrent workers from retrying against the provider in lockstep
+                wait_time = random.uniform(0, min(30.0, 1.0 * (2 ** attempt)))
+                logger.info("Retrying in %.2f seconds...", wait_time)
+                if stop_event is not None:
+                    stop_event.wait(wait_time) # Wakes up early if the batch is cancelled
+                else:
+                    time.sleep(wait_time)
             else:
                 raise RuntimeError(f"Max retries ({max_retries}) reached for speaker {speaker_id} ({voice_code}). Audio generation failed.")
         except Exception as e: # Catch other unexpected errors
             raise RuntimeError(f"An unexpected error occurred for speaker {speaker_id} ({voice_code}) on attempt {attempt + 1}: {e}")
 
+def _trim_generated_audio(original_audio_file: str, trimmed_audio_file: str, enable_trim: bool) -> str:
+    """Trims silence from one generated audio file and removes the untrimmed original."""
+    trim_audio_silence(original_audio_file, trimmed_audio_file, enable_trim=enable_trim)
+    # Clean up the original untrimmed file
+    try:
+        os.remove(original_audio_file)
+    except OSError as e:
+        logger.warning("Error removing untrimmed audio file %s: %s", original_audio_file, e)
+    return trimmed_audio_file
+
+def _remove_future_audio_file(future):
+    """Done-callback that deletes the audio file produced by a generation future abandoned after cancellation."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    audio_file = future.result()
+    if audio_file:
+        _remove_audio_file(audio_file)
+
+def _discard_trim_files_callback(original_audio_file: str, trimmed_audio_file: str):
+    """Builds a done-callback that deletes both files of a trim task abandoned after cancellation."""
+    def _discard(_future):
+        _remove_audio_file(original_audio_file)
+        _remove_audio_file(trimmed_audio_file)
+    return _discard
+
+def _stop_on_trim_failure_callback(index: int, trim_failures: list, stop_event: threading.Event):
+    """Builds a done-callback that records a failed trim and stops the TTS stage without waiting for it to drain."""
+    def _check(trim_future):
+        if trim_future.cancelled() or trim_future.exception() is None:
+            return
+        trim_failures.append((index, trim_future.exception()))
+        stop_event.set()
+    return _check
+
 def _generate_all_audio_files(podcast_script, config_data, tts_adapter, threads, enable_trim_silence: bool = True):
     """
     Orchestrates the generation of individual audio files.
@@ -718,78 +871,129 @@ def _generate_all_audio_files(podcast_script, config_data, tts_adapter, threads,
     print("\nGenerating audio files...")
     # test script
     # podcast_script = json.loads("{\"podcast_transcripts\":[{\"speaker_id\":0,\"dialog\":\"欢迎收听，来生小酒馆，客官不进来喝点吗？今天咱们来唠唠AI。 小希，你有什么新鲜事来分享吗？\"},{\"speaker_id\":1,\"dialog\":\"当然了， AI 编程工具 Cursor 给开发者送上了一份大礼，付费用户现在可以限时免费体验 GPT 5 的强大编码能力\"}]}")
-    transcripts = podcast_script.get("podcast_transcripts", [])
+    # Sanitize every dialog up front so workers only do network I/O; copies keep the returned script untouched
+    transcripts = [
+        {**item, "dialog": _DIALOG_SANITIZE_RE.sub('', item.get("dialog") or "")}
+        for item in podcast_script.get("podcast_transcripts", [])
+    ]
     
     max_retries = config_data.get("tts_max_retries", 3) # 从配置中获取最大重试次数，默认3次
+    # Build the voice lookup once per script instead of once per transcript item
+    voice_map = {voice["code"]: voice for voice in config_data.get("voices", []) if voice.get("code")}
+    pod_users = config_data.get("podUsers", [])
     
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    
-    audio_files_dict = {}
+    # Indices are dense (0..N-1), so results are stored by position and come out already in script order
+    original_audio_files = [None] * len(transcripts)
+    audio_files = [None] * len(transcripts)
+    # Validate every item before anything is submitted, so a bad speaker_id fails the script immediately
+    voice_settings = [_resolve_item_voice(item, voice_map, pod_users, tts_adapter) for item in transcripts]
+    # Repeated lines with the same voice ("嗯", "对", greetings) are synthesized once;
+    # later occurrences reuse the first one's trimmed file (ffmpeg concat accepts repeated entries)
+    first_index_by_line = {}
+    duplicate_indices = {}
+    for i, item in enumerate(transcripts):
+        first_index = first_index_by_line.setdefault((voice_settings[i], item["dialog"].strip()), i)
+        if first_index != i:
+            duplicate_indices.setdefault(first_index, []).append(i)
+    if duplicate_indices:
+        print(f"Reusing audio for {len(transcripts) - len(first_index_by_line)} repeated dialog line(s).")
     
-    with ThreadPoolExecutor(max_workers=threads) as executor:
+    # Set on the first failure so that queued and retrying workers stop early
+    stop_event = threading.Event()
+    # Two pipeline stages: TTS requests (network-bound) feed silence trimming (ffmpeg subprocesses),
+    # so item N is trimmed while later items are still being synthesized.
+    executor = ThreadPoolExecutor(max_workers=threads)
+    trim_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+    cancelled = False
+    try:
         future_to_index = {
-            executor.submit(generate_audio_for_item, item, config_data, tts_adapter, max_retries): i
-            for i, item in enumerate(transcripts)
+            executor.submit(generate_audio_for_item, transcripts[i], voice_settings[i], tts_adapter, max_retries, stop_event): i
+            for i in first_index_by_line.values()
         }
+        trim_future_to_index = {}
         
         exception_caught = None
+        # Filled by _stop_on_trim_failure_callback, which also sets stop_event so queued TTS calls are skipped
+        trim_failures = []
         for future in as_completed(future_to_index):
+            if trim_failures:
+                break
             index = future_to_index[future]
             try:
                 original_audio_file = future.result()
                 if original_audio_file:
-                    # Define a path for the trimmed audio file
-                    trimmed_audio_file = os.path.join(output_dir, f"trimmed_{os.path.basename(original_audio_file)}")
-                    trim_audio_silence(original_audio_file, trimmed_audio_file, enable_trim=enable_trim_silence)
-                    # Use the trimmed file for the final merge
-                    audio_files_dict[index] = trimmed_audio_file
-                    # Clean up the original untrimmed file
-                    try:
-                        os.remove(original_audio_file)
-                    except OSError as e:
-                        print(f"Error removing untrimmed audio file {original_audio_file}: {e}")
+                    original_audio_files[index] = original_audio_file
+                    if enable_trim_silence and not tts_adapter[voice_settings[index][1]].is_pretrimmed():
+                        # Define a path for the trimmed audio file and hand it to the trim stage
+                        trimmed_audio_file = os.path.join(output_dir, f"trimmed_{os.path.basename(original_audio_file)}")
+                        trim_future = trim_executor.submit(_trim_generated_audio, original_audio_file, trimmed_audio_file, enable_trim_silence)
+                        trim_future_to_index[trim_future] = index
+                        trim_future.add_done_callback(_stop_on_trim_failure_callback(index, trim_failures, stop_event))
+                    else:
+                        # Nothing to trim, so the generated file is merged as is instead of being copied by ffmpeg
+                        trimmed_audio_file = original_audio_file
+                    audio_files[index] = trimmed_audio_file
+                    for duplicate_index in duplicate_indices.get(index, ()):
+                        audio_files[duplicate_index] = trimmed_audio_file
             except Exception as e:
-                exception_caught = RuntimeError(f"Error generating or trimming audio for item {index}: {e}")
+                exception_caught = RuntimeError(f"Error generating audio for item {index}: {e}")
                 # An error occurred, we should stop.
                 break
 
-        # If we broke out of the loop due to an exception, cancel other futures.
+        if trim_failures:
+            # Report the trim error rather than the cancellations it caused in the TTS stage
+            index, trim_error = trim_failures[0]
+            exception_caught = RuntimeError(f"Error trimming audio for item {index}: {trim_error}")
+
+        if not exception_caught:
+            for trim_future in as_completed(trim_future_to_index):
+                index = trim_future_to_index[trim_future]
+                try:
+                    trim_future.result()
+                except Exception as e:
+                    exception_caught = RuntimeError(f"Error trimming audio for item {index}: {e}")
+                    break
+
+        # If we broke out of a loop due to an exception, cancel other futures and discard generated audio.
         if exception_caught:
             print(f"An error occurred: {exception_caught}. Cancelling outstanding tasks.")
-            for f in future_to_index:
-                if not f.done():
-                    f.cancel()
+            cancelled = True
+            stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            trim_executor.shutdown(wait=False, cancel_futures=True)
+            # In-flight requests and trims cannot be interrupted; remove their files once they finish.
+            # Every TTS future without a recorded result gets the callback: add_done_callback runs it
+            # immediately for futures that already finished but were never collected by the loop above.
+            for f, index in future_to_index.items():
+                if original_audio_files[index] is None:
+                    f.add_done_callback(_remove_future_audio_file)
+            for trim_future, index in trim_future_to_index.items():
+                if not trim_future.done():
+                    trim_future.add_done_callback(_discard_trim_files_callback(original_audio_files[index], audio_files[index]))
+            for original_audio_file, trimmed_audio_file in zip(original_audio_files, audio_files):
+                if original_audio_file:
+                    _remove_audio_file(original_audio_file)
+                    _remove_audio_file(trimmed_audio_file)
             raise exception_caught
+    finally:
+        if not cancelled:
+            executor.shutdown(wait=True)
+            trim_executor.shutdown(wait=True)
     
-    audio_files = [audio_files_dict[i] for i in sorted(audio_files_dict.keys())]
+    # Items that produced no audio leave a gap; _check_audio_file_count reports it
+    audio_files = [audio_file for audio_file in audio_files if audio_file is not None]
     
     print(f"\nFinished generating individual audio files. Total files: {len(audio_files)}")
     return audio_files
 
-def _create_ffmpeg_file_list(audio_files, expected_count: int):
-    """Creates the file list for FFmpeg concatenation."""
+def _check_audio_file_count(audio_files, expected_count: int):
+    """Verifies that every transcript item produced an audio file before merging."""
     if not audio_files:
         raise ValueError("No audio files were generated to merge.")
     
     if len(audio_files) != expected_count:
         raise RuntimeError(f"Mismatch in audio file count. Expected {expected_count}, but got {len(audio_files)}. Some audio files might be missing or an error occurred during generation.")
 
-    # Generate a unique file list path using UUID
-    unique_id = str(uuid.uuid4()).replace("-", "")
-    unique_file_list_path = os.path.join(output_dir, f"file_list_{unique_id}.txt")
-    
-    print(f"Creating file list for ffmpeg at: {unique_file_list_path}")
-    with open(unique_file_list_path, 'w', encoding='utf-8') as f:
-        for audio_file in audio_files:
-            f.write(f"file '{os.path.basename(audio_file)}'\n")
-    
-    print(f"Content of {os.path.basename(unique_file_list_path)}:")
-    with open(unique_file_list_path, 'r', encoding='utf-8') as f:
-        print(f.read())
-    
-    # Return the unique file list path for use in merge_audio_files
-    return unique_file_list_path
-
 from typing import cast # Add import for cast
 
 def initialize_tts_provider_configs():
@@ -799,14 +1003,14 @@ def initialize_tts_provider_configs():
     global tts_provider_configs_cache
     global tts_provider_map
     
-    # 清空现有缓存
-    tts_provider_configs_cache = {}
+    # 先在局部字典中构建，再整体替换，避免并发请求读到未填充完的缓存
+    provider_configs = {}
     
-    # 加载预定义映射中的配置文件
+    # 加载预定义映射中的配置文件：_load_json_config 按 mtime 缓存解析结果，未修改的文件直接返回缓存字典的浅拷贝，不会重复解析
     for provider, config_path in tts_provider_map.items():
         try:
             config_data = _load_json_config(config_path)
-            tts_provider_configs_cache[provider] = config_data  # 例如 'doubao-tts' -> 'doubao'
+            provider_configs[provider] = config_data  # 例如 'doubao-tts' -> 'doubao'
         except FileNotFoundError:
             print(f"Warning: Configuration file not found for {provider}: {config_path}")
         except json.JSONDecodeError as e:
@@ -814,6 +1018,26 @@ def initialize_tts_provider_configs():
         except Exception as e:
             print(f"Warning: Could not load configuration for {provider}: {config_path}, Error: {e}")
 
+    tts_provider_configs_cache = provider_configs
+
+@lru_cache(maxsize=8)
+def _parse_tts_providers_config(tts_providers_config_content: str) -> dict:
+    """
+    Parses tts_providers.json content, memoized on the content string since API requests usually resend the same config.
+    The returned dict is shared between calls and must not be mutated.
+    """
+    return json.loads(tts_providers_config_content)
+
+# Provider name -> (adapter class, display name, {config key: adapter constructor kwarg})
+_TTS_ADAPTER_REGISTRY = {
+    "index-tts": (IndexTTSAdapter, "IndexTTS", {"apiUrl": "api_url_template"}),
+    "edge-tts": (EdgeTTSAdapter, "EdgeTTS", {"apiUrl": "api_url_template"}),
+    "fish-audio": (FishAudioAdapter, "FishAudio", {"apiUrl": "api_url", "headers": "headers", "request_payload": "request_payload_template"}),
+    "minimax": (MinimaxAdapter, "Minimax", {"apiUrl": "api_url", "headers": "headers", "request_payload": "request_payload_template"}),
+    "doubao-tts": (DoubaoTTSAdapter, "DoubaoTTS", {"apiUrl": "api_url", "headers": "headers", "request_payload": "request_payload_template"}),
+    "gemini-tts": (GeminiTTSAdapter, "GeminiTTS", {"apiUrl": "api_url", "headers": "headers", "request_payload": "request_payload_template"}),
+}
+
 def _initialize_tts_adapter(config_data: dict, tts_providers_config_content: Optional[str] = None) -> dict:
     """
     根据配置数据初始化并返回相应的 TTS 适配器映射对象。
@@ -830,10 +1054,10 @@ def _initialize_tts_adapter(config_data: dict, tts_providers_config_content: Opt
     tts_providers_config = {}
     try:
         if tts_providers_config_content:
-            tts_providers_config = json.loads(tts_providers_config_content)
+            tts_providers_config = _parse_tts_providers_config(tts_providers_config_content)
         else:
-            tts_providers_config_content = read_file_content(tts_providers_config_path)
-            tts_providers_config = json.loads(tts_providers_config_content)
+            # Parsed once per mtime by _load_json_config; the provider blocks are shared and only read by the adapters
+            tts_providers_config = _load_json_config(tts_providers_config_path)
     except Exception as e:
         print(f"Warning: Could not load tts_providers.json: {e}")
     
@@ -846,53 +1070,24 @@ def _initialize_tts_adapter(config_data: dict, tts_providers_config_content: Opt
         current_tts_config_params = tts_provider_configs_cache.get(provider, {})
         current_tts_extra_params = tts_providers_config.get(provider.split('-')[0], {}) # 例如 'doubao-tts' -> 'doubao'
 
-        if provider == "index-tts":
-            # 优先从 config_data 获取，如果没有则从缓存中获取
-            api_url = config_data.get("apiUrl") or current_tts_config_params.get("apiUrl")
-            if not api_url:
-                raise ValueError("IndexTTS apiUrl is not configured.")
-            adapters_map[provider] = IndexTTSAdapter(api_url_template=cast(str, api_url), tts_extra_params=cast(dict, current_tts_extra_params))
-        elif provider == "edge-tts":
-            # 优先从 config_data 获取，如果没有则从缓存中获取
-            api_url = config_data.get("apiUrl") or current_tts_config_params.get("apiUrl")
-            if not api_url:
-                raise ValueError("EdgeTTS apiUrl is not configured.")
-            adapters_map[provider] = EdgeTTSAdapter(api_url_template=cast(str, api_url), tts_extra_params=cast(dict, current_tts_extra_params))
-
-        elif provider == "fish-audio":
-            # 优先从 config_data 获取，如果没有则从缓存中获取
-            api_url = config_data.get("apiUrl") or current_tts_config_params.get("apiUrl")
-            headers = config_data.get("headers") or current_tts_config_params.get("headers")
-            request_payload = config_data.get("request_payload") or current_tts_config_params.get("request_payload")
-            if not all([api_url, headers, request_payload]):
-                raise ValueError("FishAudio requires apiUrl, headers, and request_payload configuration.")
-            adapters_map[provider] = FishAudioAdapter(api_url=cast(str, api_url), headers=cast(dict, headers), request_payload_template=cast(dict, request_payload), tts_extra_params=cast(dict, current_tts_extra_params))
-        elif provider == "minimax":
-            # 优先从 config_data 获取，如果没有则从缓存中获取
-            api_url = config_data.get("apiUrl") or current_tts_config_params.get("apiUrl")
-            headers = config_data.get("headers") or current_tts_config_params.get("headers")
-            request_payload = config_data.get("request_payload") or current_tts_config_params.get("request_payload")
-            if not all([api_url, headers, request_payload]):
-                raise ValueError("Minimax requires apiUrl, headers, and request_payload configuration.")
-            adapters_map[provider] = MinimaxAdapter(api_url=cast(str, api_url), headers=cast(dict, headers), request_payload_template=cast(dict, request_payload), tts_extra_params=cast(dict, current_tts_extra_params))
-        elif provider == "doubao-tts":
-            # 优先从 config_data 获取，如果没有则从缓存中获取
-            api_url = config_data.get("apiUrl") or current_tts_config_params.get("apiUrl")
-            headers = config_data.get("headers") or current_tts_config_params.get("headers")
-            request_payload = config_data.get("request_payload") or current_tts_config_params.get("request_payload")
-            if not all([api_url, headers, request_payload]):
-                raise ValueError("DoubaoTTS requires apiUrl, headers, and request_payload configuration.")
-            adapters_map[provider] = DoubaoTTSAdapter(api_url=cast(str, api_url), headers=cast(dict, headers), request_payload_template=cast(dict, request_payload), tts_extra_params=cast(dict, current_tts_extra_params))
-        elif provider == "gemini-tts":
-            # 优先从 config_data 获取，如果没有则从缓存中获取
-            api_url = config_data.get("apiUrl") or current_tts_config_params.get("apiUrl")
-            headers = config_data.get("headers") or current_tts_config_params.get("headers")
-            request_payload = config_data.get("request_payload") or current_tts_config_params.get("request_payload")
-            if not all([api_url, headers, request_payload]):
-                raise ValueError("GeminiTTS requires apiUrl, headers, and request_payload configuration.")
-            adapters_map[provider] = GeminiTTSAdapter(api_url=cast(str, api_url), headers=cast(dict, headers), request_payload_template=cast(dict, request_payload), tts_extra_params=cast(dict, current_tts_extra_params))
-        else:
+        registry_entry = _TTS_ADAPTER_REGISTRY.get(provider)
+        if registry_entry is None:
             raise ValueError(f"Unsupported TTS provider: {provider}")
+        adapter_cls, display_name, kwarg_mapping = registry_entry
+
+        # 优先从 config_data 获取，如果没有则从缓存中获取
+        adapter_kwargs = {
+            kwarg_name: config_data.get(config_key) or current_tts_config_params.get(config_key)
+            for config_key, kwarg_name in kwarg_mapping.items()
+        }
+        if not all(adapter_kwargs.values()):
+            if len(kwarg_mapping) == 1:
+                raise ValueError(f"{display_name} {next(iter(kwarg_mapping))} is not configured.")
+            raise ValueError(f"{display_name} requires {', '.join(list(kwarg_mapping)[:-1])}, and {list(kwarg_mapping)[-1]} configuration.")
+        adapter = adapter_cls(**adapter_kwargs, tts_extra_params=cast(dict, current_tts_extra_params), session=_HTTP_SESSION)
+        # Fix the cache fingerprint now, before generate_audio rewrites api_url/api_url_template on the first call
+        adapter.cache_fingerprint()
+        adapters_map[provider] = adapter
     
     return adapters_map
 
@@ -915,8 +1110,8 @@ def generate_podcast_audio():
     tts_adapter = _initialize_tts_adapter(config_data) # 初始化 TTS 适配器，现在返回适配器映射
 
     audio_files = _generate_all_audio_files(podcast_script, config_data, tts_adapter, args.threads, enable_trim_silence=True)
-    file_list_path_created = _create_ffmpeg_file_list(audio_files, len(podcast_script.get("podcast_transcripts", [])))
-    output_audio_filepath = merge_audio_files(file_list_path_created)
+    _check_audio_file_count(audio_files, len(podcast_script.get("podcast_transcripts", [])))
+    output_audio_filepath = merge_audio_files(audio_files)
     return {
         "output_audio_filepath": output_audio_filepath,
         "overview_content": overview_content,
@@ -962,8 +1157,8 @@ def generate_podcast_audio_api(args, config_path: str, input_txt_content: str, t
     tts_adapter = _initialize_tts_adapter(config_data, tts_providers_config_content) # 初始化 TTS 适配器，现在返回适配器映射
 
     audio_files = _generate_all_audio_files(podcast_script, config_data, tts_adapter, args.threads, enable_trim_silence=True)
-    file_list_path_created = _create_ffmpeg_file_list(audio_files, len(podcast_script.get("podcast_transcripts", [])))
-    output_audio_filepath = merge_audio_files(file_list_path_created)
+    _check_audio_file_count(audio_files, len(podcast_script.get("podcast_transcripts", [])))
+    output_audio_filepath = merge_audio_files(audio_files)
     
     audio_duration_seconds = get_audio_duration(os.path.join(output_dir, output_audio_filepath))
     formatted_duration = "00:00"
@@ -985,6 +1180,8 @@ def generate_podcast_audio_api(args, config_path: str, input_txt_content: str, t
 
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Initialize TTS provider configs cache at startup
     initialize_tts_provider_configs()
     
@@ -1037,8 +1234,8 @@ def generate_podcast_with_story_api(args, config_path: str, input_txt_content: s
     tts_adapter = _initialize_tts_adapter(config_data, tts_providers_config_content) # 初始化 TTS 适配器，现在返回适配器映射
 
     audio_files = _generate_all_audio_files(podcast_script, config_data, tts_adapter, args.threads, enable_trim_silence=True)
-    file_list_path_created = _create_ffmpeg_file_list(audio_files, len(podcast_script.get("podcast_transcripts", [])))
-    output_audio_filepath = merge_audio_files(file_list_path_created)
+    _check_audio_file_count(audio_files, len(podcast_script.get("podcast_transcripts", [])))
+    output_audio_filepath = merge_audio_files(audio_files)
     
     audio_duration_seconds = get_audio_duration(os.path.join(output_dir, output_audio_filepath))
     formatted_duration = "00:00"
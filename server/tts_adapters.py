@@ -1,19 +1,101 @@
 import os
 import json # 导入 json 模块
 import base64 # 导入 base64 模块
+import copy
+import hashlib
+import http.cookiejar
 from msgpack.fallback import EX_CONSTRUCT
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import uuid
 import urllib.parse
 import re # Add re import
 import time # Add time import
+import threading
+import contextlib
+import logging
 from abc import ABC, abstractmethod
 from typing import Optional # Add Optional import
 
+logger = logging.getLogger(__name__)
+
+# tts_extra_params 中不影响合成结果的键：凭据和调度参数，不参与缓存指纹的计算
+_FINGERPRINT_IGNORED_PARAMS = frozenset({"api_key", "group_id", "X-Api-App-Id", "X-Api-Access-Key", "max_concurrency", "pretrimmed"})
+
+# 各提供商共享的并发信号量：(适配器类名, 并发上限) -> BoundedSemaphore。
+# 每次请求都会新建适配器实例，信号量放在模块级别，才能让同一进程内并发的所有请求共同受限。
+_concurrency_semaphores = {}
+_concurrency_semaphore_lock = threading.Lock()
+
+def _new_pooled_session(pool_maxsize: int = 64) -> requests.Session:
+    """
+    创建带连接池的 Session：生成流程共享的 session 和未传入 session 的适配器都使用它。
+    requests 默认每个主机只保留 10 个连接，线程数较多时多余的连接会在每次请求后被丢弃并重新握手，因此放大连接池。
+    传输层只重试连接失败（请求尚未发出）；超时和 HTTP 错误状态（包括带 Retry-After 的 429/503）由 generate_audio_for_item 统一重试，避免两层重试叠加。
+    该 session 会被不同调用方的请求共享，因此不保存服务端下发的 cookie，每个请求都不带上其他请求留下的状态。
+    """
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    retry = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2, respect_retry_after_header=False)
+    http_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", http_adapter)
+    session.mount("http://", http_adapter)
+    return session
+
 class TTSAdapter(ABC):
     """
     抽象基类，定义 TTS 适配器的接口。
     """
+    # 返回的音频首尾已无多余静音时设为 True，生成流程将跳过 ffmpeg 去除静音的步骤
+    PRETRIMMED = False
+
+    def is_pretrimmed(self) -> bool:
+        """
+        返回该适配器输出的音频是否已去除首尾静音。
+        可通过 tts_extra_params 中的 pretrimmed 按提供商覆盖类属性 PRETRIMMED。
+        """
+        tts_extra_params = getattr(self, "tts_extra_params", None) or {}
+        return bool(tts_extra_params.get("pretrimmed", self.PRETRIMMED))
+
+    def cache_fingerprint(self) -> str:
+        """
+        返回该适配器合成配置（接口地址、请求体模板、影响合成的额外参数）的摘要，作为 TTS 缓存键的一部分。
+        修改模型、输出格式、情感等配置后，旧的缓存音频不会再被命中；凭据和调度参数（见 _FINGERPRINT_IGNORED_PARAMS）不参与计算，
+        轮换 API key 或调整 max_concurrency 不会让缓存失效。
+        generate_audio 会改写 api_url 等属性，因此 _initialize_tts_adapter 在创建适配器后、任何调用之前先计算一次并保存。
+        """
+        fingerprint = getattr(self, "_cache_fingerprint", None)
+        if fingerprint is None:
+            tts_extra_params = getattr(self, "tts_extra_params", None) or {}
+            config = {
+                "adapter": type(self).__name__,
+                "api_url": getattr(self, "api_url", None) or getattr(self, "api_url_template", None),
+                "request_payload_template": getattr(self, "request_payload_template", None),
+                "tts_extra_params": {k: v for k, v in tts_extra_params.items() if k not in _FINGERPRINT_IGNORED_PARAMS},
+            }
+            raw_config = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+            fingerprint = hashlib.blake2b(raw_config.encode("utf-8"), digest_size=16).hexdigest()
+            self._cache_fingerprint = fingerprint
+        return fingerprint
+
+    def concurrency_slot(self):
+        """
+        返回限制该提供商同时进行的 TTS 请求数量的上下文管理器，进程内所有请求共享同一上限。
+        上限由 tts_extra_params 中的 max_concurrency 配置（匹配提供商的 QPS 限制），未配置时不做限制。
+        """
+        tts_extra_params = getattr(self, "tts_extra_params", None) or {}
+        max_concurrency = tts_extra_params.get("max_concurrency")
+        if not max_concurrency:
+            return contextlib.nullcontext()
+        semaphore_key = (type(self).__name__, int(max_concurrency))
+        with _concurrency_semaphore_lock:
+            semaphore = _concurrency_semaphores.get(semaphore_key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(semaphore_key[1])
+                _concurrency_semaphores[semaphore_key] = semaphore
+        return semaphore
+
     @abstractmethod
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
         """
@@ -68,7 +150,7 @@ class TTSAdapter(ABC):
                 os.remove(current_audio_file)
                 current_audio_file = new_file_path
                 audio = adjusted_audio
-                print(f"Applied volume adjustment of {volume_adjustment} dB to {os.path.basename(current_audio_file)}")
+                logger.debug("Applied volume adjustment of %s dB to %s", volume_adjustment, current_audio_file)
 
             # 应用速度调整
             if speed_adjustment != 0.0:
@@ -81,7 +163,7 @@ class TTSAdapter(ABC):
                 else: # 如果没有音量调整，current_audio_file 仍然是原始文件
                     os.remove(audio_file_path)
                 current_audio_file = new_file_path
-                print(f"Applied speed adjustment of {speed_adjustment}% to {os.path.basename(current_audio_file)}")
+                logger.debug("Applied speed adjustment of %s%% to %s", speed_adjustment, current_audio_file)
 
             return current_audio_file
 
@@ -96,9 +178,10 @@ class IndexTTSAdapter(TTSAdapter):
     """
     IndexTTS 的 TTS 适配器实现。
     """
-    def __init__(self, api_url_template: str, tts_extra_params: Optional[dict] = None):
+    def __init__(self, api_url_template: str, tts_extra_params: Optional[dict] = None, session: Optional[requests.Session] = None):
         self.api_url_template = api_url_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = session if session is not None else _new_pooled_session() # 复用连接，避免每次请求重新握手
 
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
         encoded_text = urllib.parse.quote(text)
@@ -110,15 +193,15 @@ class IndexTTSAdapter(TTSAdapter):
             raise ValueError("API URL is not configured for IndexTTS. Cannot generate audio.")
 
         try:
-            print(f"Calling IndexTTS API with voice {voice_code}...")
-            response = requests.get(api_url, stream=True, timeout=90)
+            logger.debug("Calling IndexTTS API with voice %s...", voice_code)
+            response = self.session.get(api_url, stream=True, timeout=90)
             response.raise_for_status()
 
             temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.wav")
             with open(temp_audio_file, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
-            print(f"Generated {os.path.basename(temp_audio_file)}")
+            logger.debug("Generated %s", temp_audio_file)
             # 应用音量调整
             final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
             return final_audio_file
@@ -132,9 +215,10 @@ class EdgeTTSAdapter(TTSAdapter):
     """
     EdgeTTS 的 TTS 适配器实现。
     """
-    def __init__(self, api_url_template: str, tts_extra_params: Optional[dict] = None):
+    def __init__(self, api_url_template: str, tts_extra_params: Optional[dict] = None, session: Optional[requests.Session] = None):
         self.api_url_template = api_url_template
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = session if session is not None else _new_pooled_session() # 复用连接，避免每次请求重新握手
 
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
         encoded_text = urllib.parse.quote(text)
@@ -146,15 +230,15 @@ class EdgeTTSAdapter(TTSAdapter):
             raise ValueError("API URL is not configured for EdgeTTS. Cannot generate audio.")
 
         try:
-            print(f"Calling EdgeTTS API with voice {voice_code}...")
-            response = requests.get(api_url, stream=True, timeout=90)
+            logger.debug("Calling EdgeTTS API with voice %s...", voice_code)
+            response = self.session.get(api_url, stream=True, timeout=90)
             response.raise_for_status()
 
             temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
             with open(temp_audio_file, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
-            print(f"Generated {os.path.basename(temp_audio_file)}")
+            logger.debug("Generated %s", temp_audio_file)
             # 应用音量调整
             final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
             return final_audio_file
@@ -169,11 +253,13 @@ class FishAudioAdapter(TTSAdapter):
     """
     FishAudio 的 TTS 适配器实现。
     """
-    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
+    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None, session: Optional[requests.Session] = None):
         self.api_url = api_url
-        self.headers = headers
-        self.request_payload_template = request_payload_template
+        # 配置字典由缓存共享，适配器会改写 headers，因此各自持有一份副本
+        self.headers = dict(headers)
+        self.request_payload_template = copy.deepcopy(request_payload_template)
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = session if session is not None else _new_pooled_session() # 复用连接，避免每次请求重新握手
 
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
         try:
@@ -191,14 +277,14 @@ class FishAudioAdapter(TTSAdapter):
         packed_payload = msgpack.packb(payload, use_bin_type=True)
 
         try:
-            print(f"Calling FishAudio API with voice {voice_code}...")
-            response = requests.post(self.api_url, data=packed_payload, headers=self.headers, timeout=90) # Increased timeout for FishAudio
+            logger.debug("Calling FishAudio API with voice %s...", voice_code)
+            response = self.session.post(self.api_url, data=packed_payload, headers=self.headers, timeout=90) # Increased timeout for FishAudio
 
             temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
             with open(temp_audio_file, "wb") as f:
                 f.write(response.content)
 
-            print(f"Generated {os.path.basename(temp_audio_file)}")
+            logger.debug("Generated %s", temp_audio_file)
             # 应用音量调整
             final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
             return final_audio_file
@@ -213,16 +299,19 @@ class MinimaxAdapter(TTSAdapter):
     """
     Minimax 的 TTS 适配器实现。
     """
-    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
+    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None, session: Optional[requests.Session] = None):
         self.api_url = api_url
-        self.headers = headers
-        self.request_payload_template = request_payload_template
+        # 配置字典由缓存共享，适配器会改写 headers，因此各自持有一份副本
+        self.headers = dict(headers)
+        self.request_payload_template = copy.deepcopy(request_payload_template)
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = session if session is not None else _new_pooled_session() # 复用连接，避免每次请求重新握手
 
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
 
         # 构造请求体
-        payload = self.request_payload_template.copy()
+        # 深拷贝：voice_setting 是嵌套字典，浅拷贝会让并发请求共享并互相覆盖
+        payload = copy.deepcopy(self.request_payload_template)
         payload["text"] = text
         payload["voice_setting"]["voice_id"] = voice_code
         self.headers["Authorization"] = self.headers["Authorization"].replace("{{api_key}}", self.tts_extra_params["api_key"])
@@ -235,8 +324,8 @@ class MinimaxAdapter(TTSAdapter):
             is_hex_output = False
             
         try:
-            print(f"Calling Minimax API with voice {voice_code}...")
-            response = requests.post(self.api_url, json=payload, headers=self.headers, timeout=90) # Increased timeout for Minimax
+            logger.debug("Calling Minimax API with voice %s...", voice_code)
+            response = self.session.post(self.api_url, json=payload, headers=self.headers, timeout=90) # Increased timeout for Minimax
 
             temp_audio_file = os.path.join(output_dir, f"temp_audio_{uuid.uuid4()}.mp3")
             response_data = response.json()
@@ -252,13 +341,13 @@ class MinimaxAdapter(TTSAdapter):
                     raise RuntimeError("Minimax API returned success but no audio URL found when output_format is not hex.")
                 
                 # 下载音频文件
-                audio_response = requests.get(audio_url, stream=True, timeout=90)
+                audio_response = self.session.get(audio_url, stream=True, timeout=90)
                 audio_response.raise_for_status()
                 with open(temp_audio_file, 'wb') as f:
                     for chunk in audio_response.iter_content(chunk_size=8192):
                         f.write(chunk)
 
-            print(f"Generated {os.path.basename(temp_audio_file)}")
+            logger.debug("Generated %s", temp_audio_file)
             # 应用音量调整
             final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
             return final_audio_file
@@ -273,23 +362,25 @@ class DoubaoTTSAdapter(TTSAdapter):
     """
     豆包TTS 的 TTS 适配器实现。
     """
-    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
+    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None, session: Optional[requests.Session] = None):
         self.api_url = api_url
-        self.headers = headers
-        self.request_payload_template = request_payload_template
+        # 配置字典由缓存共享，适配器会改写 headers，因此各自持有一份副本
+        self.headers = dict(headers)
+        self.request_payload_template = copy.deepcopy(request_payload_template)
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = session if session is not None else _new_pooled_session() # 复用连接，避免每次请求重新握手
 
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
-        session = requests.Session()
         try:
-            payload = self.request_payload_template.copy()
+            # 深拷贝：req_params 是嵌套字典，浅拷贝会让并发请求共享并互相覆盖文本
+            payload = copy.deepcopy(self.request_payload_template)
             payload['req_params']['text'] = text
             payload['req_params']['speaker'] = voice_code
             self.headers["X-Api-App-Id"] = self.headers["X-Api-App-Id"].replace("{{X-Api-App-Id}}", self.tts_extra_params["X-Api-App-Id"])
             self.headers["X-Api-Access-Key"] = self.headers["X-Api-Access-Key"].replace("{{X-Api-Access-Key}}", self.tts_extra_params["X-Api-Access-Key"])
 
-            print(f"Calling Doubao TTS API with voice {voice_code}...")
-            response = session.post(self.api_url, headers=self.headers, json=payload, stream=True, timeout=90)
+            logger.debug("Calling Doubao TTS API with voice %s...", voice_code)
+            response = self.session.post(self.api_url, headers=self.headers, json=payload, stream=True, timeout=90)
             response.raise_for_status()
 
             audio_data = bytearray()
@@ -317,7 +408,7 @@ class DoubaoTTSAdapter(TTSAdapter):
             with open(temp_audio_file, "wb") as f:
                 f.write(audio_data)
 
-            print(f"Generated {os.path.basename(temp_audio_file)}")
+            logger.debug("Generated %s", temp_audio_file)
             # 应用音量调整
             final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
             return final_audio_file
@@ -326,24 +417,25 @@ class DoubaoTTSAdapter(TTSAdapter):
             raise RuntimeError(f"Error calling Doubao TTS API with voice {voice_code}: {e}")
         except Exception as e:
             raise RuntimeError(f"Error processing Doubao TTS API response for voice {voice_code}: {e}")
-        finally:
-            session.close()
 
 
 class GeminiTTSAdapter(TTSAdapter):
     """
     Gemini TTS 的 TTS 适配器实现。
     """
-    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None):
+    def __init__(self, api_url: str, headers: dict, request_payload_template: dict, tts_extra_params: Optional[dict] = None, session: Optional[requests.Session] = None):
         self.api_url = api_url
-        self.headers = headers
-        self.request_payload_template = request_payload_template
+        # 配置字典由缓存共享，适配器会改写 headers，因此各自持有一份副本
+        self.headers = dict(headers)
+        self.request_payload_template = copy.deepcopy(request_payload_template)
         self.tts_extra_params = tts_extra_params if tts_extra_params is not None else {}
+        self.session = session if session is not None else _new_pooled_session() # 复用连接，避免每次请求重新握手
 
     def generate_audio(self, text: str, voice_code: str, output_dir: str, volume_adjustment: float = 0.0, speed_adjustment: float = 0.0) -> str:
         try:
             # 构造请求体
-            payload = self.request_payload_template.copy()
+            # 深拷贝：contents/generationConfig 是嵌套结构，浅拷贝会让并发请求共享并互相覆盖文本
+            payload = copy.deepcopy(self.request_payload_template)
             model_name = payload['model']
             api_url = self.api_url.replace('{{model}}', model_name) if '{{model}}' in self.api_url else self.api_url
 
@@ -355,8 +447,8 @@ class GeminiTTSAdapter(TTSAdapter):
             gemini_api_key = self.tts_extra_params.get('api_key')
             self.headers['x-goog-api-key'] = gemini_api_key
 
-            print(f"Calling Gemini TTS API with voice {voice_code}...")
-            response = requests.post(api_url, headers=self.headers, json=payload, timeout=90)
+            logger.debug("Calling Gemini TTS API with voice %s...", voice_code)
+            response = self.session.post(api_url, headers=self.headers, json=payload, timeout=90)
             response.raise_for_status()
 
             response_data = response.json()
@@ -372,7 +464,7 @@ class GeminiTTSAdapter(TTSAdapter):
                 f.setframerate(24000) # 假设 24kHz 采样率
                 f.writeframes(audio_data_pcm)
 
-            print(f"Generated {os.path.basename(temp_audio_file)}")
+            logger.debug("Generated %s", temp_audio_file)
             # 应用音量和速度调整
             final_audio_file = self._apply_audio_effects(temp_audio_file, volume_adjustment, speed_adjustment)
             return final_audio_file
@@ -0,0 +1,221 @@
+import os
+import shutil
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 缓存的音频可能的扩展名（适配器输出 mp3 或 wav）
+_AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+def tts_cache_key(dialog: str, voice_code: str, provider: Optional[str], volume_adjustment: float, speed_adjustment: float, adapter_fingerprint: str = "") -> str:
+    """
+    根据对白文本、语音代码、提供商、音量/速度调整以及适配器配置摘要（见 TTSAdapter.cache_fingerprint）生成缓存键。
+    文本会先去除首尾空白并转为小写，使经过正则清理后的相同对白命中同一条缓存。
+    """
+    normalized_dialog = dialog.strip().lower()
+    raw_key = "\x1f".join([normalized_dialog, voice_code or "", provider or "", str(float(volume_adjustment)), str(float(speed_adjustment)), adapter_fingerprint])
+    return hashlib.blake2b(raw_key.encode("utf-8"), digest_size=20).hexdigest()
+
+def _new_temp_audio_path(output_dir: str, ext: str) -> str:
+    return os.path.join(output_dir, f"temp_audio_{uuid.uuid4().hex}{ext}")
+
+
+class TTSCacheBackend(ABC):
+    """
+    TTS 音频缓存后端的抽象基类。
+    """
+    @abstractmethod
+    def get(self, key: str, output_dir: str) -> Optional[str]:
+        """
+        查找缓存。命中时将音频复制到 output_dir 下的新临时文件并返回其路径（调用方可以随意删除），未命中返回 None。
+        """
+        pass
+
+    @abstractmethod
+    def put(self, key: str, audio_file_path: str) -> None:
+        """
+        将生成的音频文件存入缓存。原文件保持不变。
+        """
+        pass
+
+
+class FileTTSCache(TTSCacheBackend):
+    """
+    基于文件系统的 TTS 缓存，以 <key><ext> 的形式保存在 cache_dir 中，可跨进程和重启复用。
+    命中时会刷新文件的 mtime；超过 max_age_seconds 未被使用的条目视为失效，
+    条目数超过 max_entries 时按 mtime 删除最久未使用的条目。
+    """
+    def __init__(self, cache_dir: str, max_entries: int = 5000, max_age_seconds: float = 30 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # 近似的条目数（其他进程也可能写入），超过上限时才扫描目录清理
+        self._entry_count = len(self._list_entries())
+
+    def _list_entries(self) -> list:
+        """返回缓存目录中的 (mtime, path) 列表。"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(_AUDIO_EXTENSIONS) and entry.is_file():
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+        return entries
+
+    def _prune(self) -> None:
+        """删除过期条目，并按 mtime 淘汰最久未使用的条目，直到条目数降到上限的 90%。"""
+        entries = sorted(self._list_entries())
+        expire_before = time.time() - self.max_age_seconds
+        keep_count = int(self.max_entries * 0.9)
+        removed = 0
+        for i, (mtime, path) in enumerate(entries):
+            if mtime >= expire_before and len(entries) - i <= keep_count:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        self._entry_count = len(entries) - removed
+
+    def get(self, key: str, output_dir: str) -> Optional[str]:
+        for ext in _AUDIO_EXTENSIONS:
+            cached_path = os.path.join(self.cache_dir, f"{key}{ext}")
+            try:
+                mtime = os.stat(cached_path).st_mtime
+            except OSError:
+                continue
+            if time.time() - mtime > self.max_age_seconds:
+                try:
+                    os.remove(cached_path)
+                except OSError:
+                    pass
+                return None
+            temp_audio_file = _new_temp_audio_path(output_dir, ext)
+            try:
+                shutil.copyfile(cached_path, temp_audio_file)
+                os.utime(cached_path) # 刷新 mtime，标记为最近使用
+            except OSError:
+                return None
+            return temp_audio_file
+        return None
+
+    def put(self, key: str, audio_file_path: str) -> None:
+        ext = os.path.splitext(audio_file_path)[1] or ".mp3"
+        cached_path = os.path.join(self.cache_dir, f"{key}{ext}")
+        # 先写入临时文件再原子替换，避免并发读取到写了一半的文件
+        temp_cached_path = f"{cached_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(audio_file_path, temp_cached_path)
+            os.replace(temp_cached_path, cached_path)
+        except OSError as e:
+            logger.warning("Could not write TTS cache entry %s: %s", cached_path, e)
+            if os.path.exists(temp_cached_path):
+                os.remove(temp_cached_path)
+            return
+        with self._lock:
+            self._entry_count += 1
+            if self._entry_count > self.max_entries:
+                self._prune()
+
+
+class MemoryTTSCache(TTSCacheBackend):
+    """
+    进程内 LRU 缓存，保存音频字节，适用于测试或单进程短期复用。
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, output_dir: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        ext, audio_bytes = entry
+        temp_audio_file = _new_temp_audio_path(output_dir, ext)
+        with open(temp_audio_file, "wb") as f:
+            f.write(audio_bytes)
+        return temp_audio_file
+
+    def put(self, key: str, audio_file_path: str) -> None:
+        ext = os.path.splitext(audio_file_path)[1] or ".mp3"
+        try:
+            with open(audio_file_path, "rb") as f:
+                audio_bytes = f.read()
+        except OSError as e:
+            logger.warning("Could not read %s into the TTS cache: %s", audio_file_path, e)
+            return
+        with self._lock:
+            self._entries[key] = (ext, audio_bytes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_tts_cache = None
+_tts_cache_initialized = False
+_tts_cache_lock = threading.Lock()
+
+def _positive_env_number(name: str, default, cast):
+    """
+    读取正数类型的环境变量，未设置时返回 default；取值无效时记录警告并回退到 default，而不是让每次生成都失败。
+    """
+    raw_value = os.getenv(name)
+    if raw_value is None or not raw_value.strip():
+        return default
+    try:
+        value = cast(raw_value)
+    except ValueError:
+        value = None
+    if value is None or value <= 0:
+        logger.warning("Invalid %s '%s'. Falling back to %s.", name, raw_value, default)
+        return default
+    return value
+
+def get_tts_cache() -> Optional[TTSCacheBackend]:
+    """
+    根据环境变量返回进程共享的 TTS 缓存后端，未启用时返回 None。
+
+    TTS_CACHE_BACKEND: "file"、"memory" 或 "none"。未设置时，若配置了 TTS_CACHE_DIR 则使用 "file"，否则不启用缓存。
+    TTS_CACHE_DIR: 文件缓存目录，默认 "cache/tts"。
+    TTS_CACHE_MAX_ENTRIES: 最大条目数，文件缓存默认 5000，内存缓存默认 256。
+    TTS_CACHE_MAX_AGE_DAYS: 文件缓存条目在多少天未被使用后失效，默认 30。
+    """
+    global _tts_cache, _tts_cache_initialized
+    with _tts_cache_lock:
+        if _tts_cache_initialized:
+            return _tts_cache
+
+        # 无论初始化成功与否都只尝试一次，配置错误不应让每个对白的生成都重新抛错
+        _tts_cache_initialized = True
+        cache_dir = os.getenv("TTS_CACHE_DIR")
+        backend = (os.getenv("TTS_CACHE_BACKEND") or ("file" if cache_dir else "none")).lower()
+        if backend == "file":
+            cache_dir = cache_dir or os.path.join("cache", "tts")
+            try:
+                _tts_cache = FileTTSCache(
+                    cache_dir,
+                    max_entries=_positive_env_number("TTS_CACHE_MAX_ENTRIES", 5000, int),
+                    max_age_seconds=_positive_env_number("TTS_CACHE_MAX_AGE_DAYS", 30.0, float) * 24 * 3600,
+                )
+            except OSError as e:
+                logger.warning("Could not open TTS cache directory %s: %s. TTS caching is disabled.", cache_dir, e)
+        elif backend == "memory":
+            _tts_cache = MemoryTTSCache(_positive_env_number("TTS_CACHE_MAX_ENTRIES", 256, int))
+        elif backend != "none":
+            logger.warning("Unknown TTS_CACHE_BACKEND '%s'. TTS caching is disabled.", backend)
+        return _tts_cache